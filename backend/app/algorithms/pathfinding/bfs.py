@@ -1,5 +1,6 @@
 from typing import Dict, Any, Generator, List
 from ...base_algorithm import BaseAlgorithm
+from ...graph_cache import components_disconnected
 from collections import deque
 
 class BFS(BaseAlgorithm):
@@ -38,6 +39,7 @@ class BFS(BaseAlgorithm):
             self.adjacency = data["adjacency"]
             self.start = data["start"]
             self.end = data["end"]
+            self.components = data.get("components")
         else:
             self.mode = "grid"
             if data and "grid" in data:
@@ -78,6 +80,10 @@ class BFS(BaseAlgorithm):
         
         yield { "type": "info", "payload": {}, "snapshot": self.get_snapshot(visited, []), "message": "Starting BFS...", "line": 2 }
 
+        if self.mode == "graph" and components_disconnected(self.components, self.start, self.end):
+            yield { "type": "info", "payload": {}, "snapshot": self.get_snapshot(visited, []), "message": "No path found (target is in a different component).", "line": 14 }
+            return
+
         while queue:
             curr = queue.popleft()
             
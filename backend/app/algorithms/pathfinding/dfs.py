@@ -1,5 +1,6 @@
 from typing import Dict, Any, Generator, List
 from ...base_algorithm import BaseAlgorithm
+from ...graph_cache import components_disconnected
 
 class DFS(BaseAlgorithm):
     metadata = {
@@ -31,6 +32,7 @@ class DFS(BaseAlgorithm):
             self.adjacency = data["adjacency"]
             self.start = data["start"]
             self.end = data["end"]
+            self.components = data.get("components")
         else:
             self.mode = "grid"
             if data and "grid" in data:
@@ -73,6 +75,10 @@ class DFS(BaseAlgorithm):
         
         yield { "type": "info", "payload": {}, "snapshot": self.get_snapshot(processed, []), "message": "Starting DFS...", "line": 1 }
 
+        if self.mode == "graph" and components_disconnected(self.components, self.start, self.end):
+            yield { "type": "info", "payload": {}, "snapshot": self.get_snapshot(processed, []), "message": "No path found (target is in a different component).", "line": 9 }
+            return
+
         while stack:
             curr = stack.pop()
             if curr in processed: continue
@@ -1,5 +1,6 @@
 from typing import Dict, Any, Generator, List, Tuple
 from ...base_algorithm import BaseAlgorithm
+from ...graph_cache import components_disconnected
 import heapq
 
 class Dijkstra(BaseAlgorithm):
@@ -43,6 +44,11 @@ class Dijkstra(BaseAlgorithm):
             self.start = data["start"]         # String ID
             self.end = data["end"]             # String ID
             self.nodes = data.get("nodes", {}) # Metadata for viz (x,y coords)
+            self.components = data.get("components") # Set when resolved from the graph cache
+            # Set for cached graphs queried with "alt": true. Ordering the queue by
+            # dist + lower_bound turns the search into A* (ALT): paths stay shortest,
+            # but nodes are expanded in a different, usually much smaller, order.
+            self.lower_bound = data.get("lower_bound")
         else:
             # --- GRID MODE ---
             self.mode = "grid"
@@ -85,6 +91,12 @@ class Dijkstra(BaseAlgorithm):
                     
         return neighbors
 
+    def estimate(self, node) -> float:
+        """Remaining-distance lower bound used to order the queue (0 = plain Dijkstra)."""
+        if self.mode == "graph" and self.lower_bound:
+            return self.lower_bound(node, self.end)
+        return 0
+
     def get_snapshot(self, visited, path):
         if self.mode == "graph":
             return { 
@@ -105,7 +117,7 @@ class Dijkstra(BaseAlgorithm):
         if self.mode == "grid" and not self.grid: return
         if self.mode == "graph" and not self.adjacency: return
 
-        pq = [(0, self.start)] # (distance, node_id)
+        pq = [(self.estimate(self.start), self.start)] # (priority, node_id)
         distances = {self.start: 0} # Track distances for all nodes
         previous_nodes = {}
         visited = set()
@@ -118,11 +130,17 @@ class Dijkstra(BaseAlgorithm):
             "line": 1 
         }
 
+        # Cached graphs carry component labels: unreachable targets need no search
+        if self.mode == "graph" and components_disconnected(self.components, self.start, self.end):
+            yield { "type": "info", "payload": {}, "snapshot": self.get_snapshot(visited, []), "message": "No path found (target is in a different component).", "line": 16 }
+            return
+
         while pq:
-            dist, curr = heapq.heappop(pq)
+            _, curr = heapq.heappop(pq)
             
             if curr in visited: continue
             visited.add(curr)
+            dist = distances[curr]
             
             yield { 
                 "type": "visit_node", 
@@ -160,7 +178,7 @@ class Dijkstra(BaseAlgorithm):
                 if new_dist < distances.get(neighbor, float('inf')):
                     distances[neighbor] = new_dist
                     previous_nodes[neighbor] = curr
-                    heapq.heappush(pq, (new_dist, neighbor))
+                    heapq.heappush(pq, (new_dist + self.estimate(neighbor), neighbor))
                     
                     yield { 
                         "type": "update_neighbor", 
@@ -0,0 +1,216 @@
+from typing import Dict, Any, Generator, List, Tuple
+from ...base_algorithm import BaseAlgorithm
+import heapq
+
+INF = float('inf')
+
+class LPAStar(BaseAlgorithm):
+    """
+    Lifelong Planning A* on the grid: after the first search, edits to single
+    cells are repaired incrementally instead of searching from scratch.
+    """
+
+    metadata = {
+        "name": "Lifelong Planning A* (LPA*)",
+        "pseudocode": [
+            "procedure LPAStar(G, start, goal)",
+            "  g[v] = rhs[v] = INFINITY for all v; rhs[start] = 0",
+            "  U.insert(start, key(start))",
+            "  while U.topKey() < key(goal) or rhs[goal] != g[goal]:",
+            "    u = U.pop()",
+            "    if g[u] > rhs[u]:",
+            "      g[u] = rhs[u]",
+            "      for each successor v of u: UpdateVertex(v)",
+            "    else:",
+            "      g[u] = INFINITY",
+            "      UpdateVertex(u); for each successor v of u: UpdateVertex(v)",
+            "  return path from goal back along predecessors p with min g[p]",
+            "  on cell change v: UpdateVertex(v); repeat the loop",
+            "procedure UpdateVertex(v)",
+            "  rhs[v] = min over predecessors p of g[p] + cost(p, v)",
+            "  U.remove(v); if g[v] != rhs[v]: U.insert(v, key(v))"
+        ],
+        "input_type": "grid",
+        "visualizer": "grid_2d",
+        "description": "LPA* keeps its search tree between runs. When a cell changes, only the affected part of the shortest-path tree is repaired.",
+        "complexity": { "time": "O(V log V) first run, proportional to the change afterwards", "space": "O(V)" },
+        "pros": ["Guarantees shortest path.", "Replanning after small edits is much cheaper than a new search."],
+        "cons": ["Keeps the whole search state in memory.", "Large edits can cost more than searching from scratch."]
+    }
+
+    def __init__(self, data: Any, weighted: bool = True):
+        super().__init__(data)
+        if not isinstance(data, dict) or not isinstance(data.get("grid"), list) or not data["grid"]:
+            raise ValueError("LPA* needs a grid with start and end cells.")
+        self.grid = data["grid"]
+        if not all(isinstance(row, list) for row in self.grid) or not self.grid[0]:
+            raise ValueError("Grid must be a non-empty list of rows.")
+        self.rows = len(self.grid)
+        self.cols = len(self.grid[0])
+        if any(len(row) != self.cols for row in self.grid):
+            raise ValueError("All grid rows must have the same length.")
+        if any(isinstance(cell, bool) or cell not in (0, 1, 5) for row in self.grid for cell in row):
+            raise ValueError("Grid cells must be 0 (path), 1 (wall) or 5 (weight).")
+        self.start = self.parse_cell(data, "start")
+        self.end = self.parse_cell(data, "end")
+        # weighted=False reproduces BFS (every open cell costs 1), True reproduces Dijkstra.
+        self.weighted = weighted
+
+        self.g: Dict[Tuple[int, int], float] = {}
+        self.rhs: Dict[Tuple[int, int], float] = {self.start: 0}
+        self.queue: List[Tuple[Tuple[float, float], Tuple[int, int]]] = []
+        self.queued: Dict[Tuple[int, int], Tuple[float, float]] = {} # Current key of each queued cell
+        self.visited = set() # Cells with a finite g value
+
+    def parse_cell(self, data: Dict[str, Any], key: str) -> Tuple[int, int]:
+        cell = data.get(key)
+        if not isinstance(cell, dict) or not (self.is_index(cell.get("row"), self.rows) and self.is_index(cell.get("col"), self.cols)):
+            raise ValueError(f"'{key}' must be {{row, col}} inside the grid.")
+        return (cell["row"], cell["col"])
+
+    def heuristic(self, node) -> int:
+        # Manhattan distance; every move costs at least 1, so it stays consistent.
+        return abs(node[0] - self.end[0]) + abs(node[1] - self.end[1])
+
+    def cost(self, node) -> float:
+        """Cost of moving into `node` (1 = Wall, 5 = Weight)."""
+        cell_val = self.grid[node[0]][node[1]]
+        if cell_val == 1: return INF
+        return 5 if self.weighted and cell_val == 5 else 1
+
+    def get_neighbors(self, node) -> List[Tuple[int, int]]:
+        neighbors = []
+        r, c = node
+        for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < self.rows and 0 <= nc < self.cols:
+                neighbors.append((nr, nc))
+        return neighbors
+
+    def calculate_key(self, node) -> Tuple[float, float]:
+        best = min(self.g.get(node, INF), self.rhs.get(node, INF))
+        return (best + self.heuristic(node), best)
+
+    def top_key(self) -> Tuple[float, float]:
+        # Entries are removed lazily: skip those whose key is no longer current.
+        while self.queue and self.queued.get(self.queue[0][1]) != self.queue[0][0]:
+            heapq.heappop(self.queue)
+        return self.queue[0][0] if self.queue else (INF, INF)
+
+    def update_vertex(self, node) -> None:
+        if node != self.start:
+            self.rhs[node] = min((self.g.get(p, INF) + self.cost(node) for p in self.get_neighbors(node)), default=INF)
+        self.queued.pop(node, None)
+        if self.g.get(node, INF) != self.rhs.get(node, INF):
+            key = self.calculate_key(node)
+            self.queued[node] = key
+            heapq.heappush(self.queue, (key, node))
+
+    def compute_shortest_path(self) -> Generator[Tuple[Tuple[int, int], bool], None, None]:
+        """Expands inconsistent cells until the goal is consistent; yields (cell, became_reachable)."""
+        while self.top_key() < self.calculate_key(self.end) or self.rhs.get(self.end, INF) != self.g.get(self.end, INF):
+            _, curr = heapq.heappop(self.queue)
+            del self.queued[curr]
+            if self.g.get(curr, INF) > self.rhs.get(curr, INF):
+                self.g[curr] = self.rhs[curr]
+                self.visited.add(curr)
+                yield curr, True
+                for neighbor in self.get_neighbors(curr):
+                    self.update_vertex(neighbor)
+            else:
+                self.g[curr] = INF
+                self.visited.discard(curr)
+                yield curr, False
+                self.update_vertex(curr)
+                for neighbor in self.get_neighbors(curr):
+                    self.update_vertex(neighbor)
+
+    def extract_path(self) -> List[Tuple[int, int]]:
+        if self.g.get(self.end, INF) == INF: return []
+        path = [self.end]
+        curr = self.end
+        while curr != self.start:
+            # Step back to the predecessor that gives curr its g value.
+            curr = min(self.get_neighbors(curr), key=lambda p: self.g.get(p, INF))
+            if self.g.get(curr, INF) == INF: return []
+            path.append(curr)
+        path.reverse()
+        return path
+
+    def get_snapshot(self, path):
+        return { "type": "grid", "visited": list(self.visited), "path": list(path), "grid": self.grid }
+
+    def run(self) -> Generator[Dict[str, Any], None, None]:
+        heapq.heappush(self.queue, (self.calculate_key(self.start), self.start))
+        self.queued[self.start] = self.queue[0][0]
+
+        yield { "type": "info", "payload": {"node": self.start}, "snapshot": self.get_snapshot([]), "message": f"Starting LPA* at {self.start}", "line": 2 }
+
+        for curr, _ in self.compute_shortest_path():
+            yield { "type": "visit_node", "payload": {"node": curr}, "snapshot": self.get_snapshot([]), "message": f"Expanding {curr} (Dist: {self.g[curr]})", "line": 6 }
+
+        yield self.path_step([])
+
+    def path_step(self, changed: List[Tuple[int, int]], snapshot: bool = True) -> Dict[str, Any]:
+        path = self.extract_path()
+        if not path:
+            return { "type": "info", "payload": {"path": [], "changed": changed}, "snapshot": self.get_snapshot([]) if snapshot else None, "message": "No path found.", "line": 11 }
+        return { "type": "found_path", "payload": {"path": path, "changed": changed}, "snapshot": self.get_snapshot(path) if snapshot else None, "message": f"Path Found! Total Cost: {self.g[self.end]}", "line": 11 }
+
+    @staticmethod
+    def is_index(value: Any, size: int) -> bool:
+        # bool is an int subclass, but True/False are not cell coordinates.
+        return isinstance(value, int) and not isinstance(value, bool) and 0 <= value < size
+
+    def validate_edits(self, message: Any) -> List[Tuple[int, int, int]]:
+        """
+        Checks a whole edit message before anything is applied.
+        Accepts a single {"row", "col", "value"} edit or {"edits": [...]}.
+        """
+        edits = message.get("edits", [message]) if isinstance(message, dict) else None
+        if not isinstance(edits, list):
+            raise ValueError("Edit message must be {row, col, value} or {edits: [...]}.")
+        parsed = []
+        for edit in edits:
+            if not isinstance(edit, dict):
+                raise ValueError(f"Edit must be an object of {{row, col, value}}: {edit}")
+            row, col, value = edit.get("row"), edit.get("col"), edit.get("value")
+            if not (self.is_index(row, self.rows) and self.is_index(col, self.cols)):
+                raise ValueError(f"Edit is outside the grid: {edit}")
+            if isinstance(value, bool) or value not in (0, 1, 5):
+                raise ValueError(f"Cell value must be 0 (path), 1 (wall) or 5 (weight): {edit}")
+            parsed.append((row, col, value))
+        return parsed
+
+    def error_step(self, reason: str) -> Dict[str, Any]:
+        """Rejected edits are reported in-band; the search state is left untouched."""
+        return { "type": "error", "payload": {}, "snapshot": None, "message": f"Edit rejected: {reason}", "line": 12 }
+
+    def apply_edits(self, message: Any) -> Generator[Dict[str, Any], None, None]:
+        """
+        Applies cell edits (0 = Path, 1 = Wall, 5 = Weight) and repairs the search.
+        Only the changed cells and the new path are streamed, without full snapshots.
+        An invalid batch is rejected as a whole with a single error step.
+        """
+        try:
+            edits = self.validate_edits(message)
+        except ValueError as e:
+            yield self.error_step(str(e))
+            return
+
+        for row, col, value in edits:
+            if self.grid[row][col] == value: continue
+            self.grid[row][col] = value
+            # Only the cost of entering the cell changed, so only its rhs needs refreshing.
+            self.update_vertex((row, col))
+            yield { "type": "edit_cell", "payload": {"node": (row, col), "value": value}, "snapshot": None, "message": f"Cell {(row, col)} set to {value}", "line": 12 }
+
+        changed = []
+        for curr, reachable in self.compute_shortest_path():
+            changed.append(curr)
+            if reachable:
+                yield { "type": "update_neighbor", "payload": {"node": curr, "distance": self.g[curr]}, "snapshot": None, "message": f"Repairing {curr} to Dist {self.g[curr]}", "line": 6 }
+            else:
+                yield { "type": "update_neighbor", "payload": {"node": curr, "distance": None}, "snapshot": None, "message": f"Invalidating {curr}", "line": 9 }
+
+        yield self.path_step(list(dict.fromkeys(changed)), snapshot=False)
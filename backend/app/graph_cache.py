@@ -0,0 +1,241 @@
+import hashlib
+import heapq
+import json
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, Any, List, Optional
+
+# How many uploaded graphs are kept before the least recently used one is evicted.
+MAX_CACHED_GRAPHS = 64
+# Upper bound on ALT landmarks per graph (each one costs two Dijkstra runs).
+MAX_LANDMARKS = 16
+
+
+class LandmarkTables:
+    """
+    One immutable set of ALT landmark distances. A query binds to the set that
+    was current when it started, so its heuristic stays consistent throughout.
+    """
+
+    def __init__(self, landmarks: List[str], landmark_from: List[Dict[str, float]], landmark_to: List[Dict[str, float]]):
+        self.landmarks = landmarks
+        self.landmark_from = landmark_from # dist(L, v)
+        self.landmark_to = landmark_to     # dist(v, L)
+
+    def lower_bound(self, u: str, v: str) -> float:
+        """Admissible ALT estimate of dist(u, v), via the triangle inequality on every landmark."""
+        bound = 0
+        for dist_from, dist_to in zip(self.landmark_from, self.landmark_to):
+            if u in dist_to and v in dist_to:
+                bound = max(bound, dist_to[u] - dist_to[v])
+            if u in dist_from and v in dist_from:
+                bound = max(bound, dist_from[v] - dist_from[u])
+        return bound
+
+
+class CachedGraph:
+    """
+    A preprocessed network graph, stored once and shared by every query against it.
+
+    - components: weakly connected component label per node. Nodes in different
+      components can never reach each other, so such queries are answered instantly.
+    - landmarks: optional ALT preprocessing. Distances from/to a few landmark nodes
+      give an admissible, consistent lower bound on the distance between any two
+      nodes, which Dijkstra uses as an A* heuristic when a query sets "alt": true.
+    """
+
+    def __init__(self, graph_id: str, adjacency: Dict[str, Dict[str, float]], nodes: Dict[str, Any], landmark_count: int = 0):
+        self.graph_id = graph_id
+        self.adjacency = adjacency
+        self.nodes = nodes
+        self.edge_count = sum(len(neighbors) for neighbors in adjacency.values())
+        self.reverse = self._build_reverse(adjacency)
+        self.components = self._label_components()
+        self.alt = LandmarkTables([], [], [])
+        if landmark_count > 0:
+            self.select_landmarks(landmark_count)
+
+    @staticmethod
+    def _build_reverse(adjacency: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+        reverse: Dict[str, Dict[str, float]] = {node: {} for node in adjacency}
+        for node, neighbors in adjacency.items():
+            for neighbor, weight in neighbors.items():
+                reverse.setdefault(neighbor, {})[node] = weight
+        return reverse
+
+    def _label_components(self) -> Dict[str, int]:
+        # Edges are followed in both directions, so the labels are weak components.
+        labels: Dict[str, int] = {}
+        label = 0
+        for root in self.reverse:
+            if root in labels: continue
+            labels[root] = label
+            queue = deque([root])
+            while queue:
+                curr = queue.popleft()
+                for neighbor in list(self.adjacency.get(curr, {})) + list(self.reverse.get(curr, {})):
+                    if neighbor not in labels:
+                        labels[neighbor] = label
+                        queue.append(neighbor)
+            label += 1
+        return labels
+
+    @staticmethod
+    def _shortest_distances(adjacency: Dict[str, Dict[str, float]], source: str) -> Dict[str, float]:
+        distances = {source: 0}
+        pq = [(0, source)]
+        while pq:
+            dist, curr = heapq.heappop(pq)
+            if dist > distances[curr]: continue
+            for neighbor, weight in adjacency.get(curr, {}).items():
+                new_dist = dist + weight
+                if new_dist < distances.get(neighbor, float('inf')):
+                    distances[neighbor] = new_dist
+                    heapq.heappush(pq, (new_dist, neighbor))
+        return distances
+
+    def select_landmarks(self, count: int) -> None:
+        # Farthest-point selection: each new landmark is the node furthest
+        # (round-trip distance) from the landmarks chosen so far.
+        # The tables are built locally and published in one assignment, so
+        # searches running in other threads never see a half-built set.
+        landmarks: List[str] = []
+        landmark_from: List[Dict[str, float]] = []
+        landmark_to: List[Dict[str, float]] = []
+        if self.reverse:
+            candidate = next(iter(self.reverse))
+            spread: Dict[str, float] = {}
+            for _ in range(min(count, MAX_LANDMARKS, len(self.reverse))):
+                landmarks.append(candidate)
+                landmark_from.append(self._shortest_distances(self.adjacency, candidate))
+                landmark_to.append(self._shortest_distances(self.reverse, candidate))
+                for node in self.reverse:
+                    reach = landmark_from[-1].get(node, 0) + landmark_to[-1].get(node, 0)
+                    spread[node] = min(spread.get(node, float('inf')), reach)
+                remaining = [node for node in self.reverse if node not in landmarks]
+                if not remaining: break
+                candidate = max(remaining, key=lambda node: spread[node])
+        self.alt = LandmarkTables(landmarks, landmark_from, landmark_to)
+
+    @property
+    def landmarks(self) -> List[str]:
+        return self.alt.landmarks
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "graph_id": self.graph_id,
+            "nodes": len(self.reverse),
+            "edges": self.edge_count,
+            "components": len(set(self.components.values())),
+            "landmarks": list(self.landmarks)
+        }
+
+
+class GraphCache:
+    """In-memory LRU store of uploaded graphs, keyed by the hash of their adjacency."""
+
+    def __init__(self, max_size: int = MAX_CACHED_GRAPHS):
+        self.max_size = max_size
+        self._graphs: "OrderedDict[str, CachedGraph]" = OrderedDict()
+        # Uploads run in the threadpool while queries resolve on the event loop.
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def content_hash(adjacency: Dict[str, Dict[str, float]]) -> str:
+        canonical = json.dumps(adjacency, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def validate(adjacency: Any) -> None:
+        if not isinstance(adjacency, dict):
+            raise ValueError("Graph adjacency must be an object of {node: {neighbor: weight}}.")
+        for node, neighbors in adjacency.items():
+            if not isinstance(neighbors, dict):
+                raise ValueError(f"Neighbors of node '{node}' must be an object of {{neighbor: weight}}.")
+            for neighbor, weight in neighbors.items():
+                if isinstance(weight, bool) or not isinstance(weight, (int, float)) or weight < 0:
+                    raise ValueError(f"Edge {node} -> {neighbor} must have a non-negative numeric weight.")
+
+    def add(self, data: Any) -> CachedGraph:
+        """Stores a graph (idempotent for identical adjacency) and returns its cache entry."""
+        if not isinstance(data, dict):
+            raise ValueError("Graph upload must be an object with an 'adjacency' field.")
+        adjacency = data.get("adjacency")
+        self.validate(adjacency)
+        landmark_count = data.get("landmarks", 0)
+        if isinstance(landmark_count, bool) or not isinstance(landmark_count, int) or landmark_count < 0:
+            raise ValueError("'landmarks' must be a non-negative integer.")
+
+        graph_id = self.content_hash(adjacency)
+        with self._lock:
+            cached = self._graphs.get(graph_id)
+        # Preprocessing runs outside the lock so lookups are never held up by it.
+        if cached is None:
+            cached = CachedGraph(graph_id, adjacency, data.get("nodes", {}), landmark_count)
+        else:
+            # Same adjacency: keep the preprocessing, but take the latest layout.
+            cached.nodes = data.get("nodes", {})
+            if len(cached.landmarks) < min(landmark_count, MAX_LANDMARKS, len(cached.reverse)):
+                cached.select_landmarks(landmark_count)
+        with self._lock:
+            self._graphs[graph_id] = cached
+            self._graphs.move_to_end(graph_id)
+            while len(self._graphs) > self.max_size:
+                self._graphs.popitem(last=False)
+        return cached
+
+    def get(self, graph_id: str) -> Optional[CachedGraph]:
+        with self._lock:
+            cached = self._graphs.get(graph_id)
+            if cached is not None:
+                self._graphs.move_to_end(graph_id)
+            return cached
+
+    def remove(self, graph_id: str) -> bool:
+        with self._lock:
+            return self._graphs.pop(graph_id, None) is not None
+
+
+graph_cache = GraphCache()
+
+
+def components_disconnected(components: Optional[Dict[Any, int]], start: Any, end: Any) -> bool:
+    """True when precomputed component labels prove that `end` cannot be reached from `start`."""
+    if not components:
+        return False
+    if start == end:
+        return False
+    start_label = components.get(start)
+    return start_label is None or start_label != components.get(end)
+
+
+def resolve_graph_input(data: Any) -> Any:
+    """
+    Swaps a `graph_id` reference for the cached, preprocessed graph.
+    Other inputs are returned untouched, so inline adjacency keeps working.
+    """
+    if not isinstance(data, dict) or "graph_id" not in data:
+        return data
+    cached = graph_cache.get(data["graph_id"])
+    if cached is None:
+        raise ValueError(f"Unknown graph_id '{data['graph_id']}'. Upload it to /api/graphs first.")
+    resolved = {key: value for key, value in data.items() if key != "graph_id"}
+    resolved["adjacency"] = cached.adjacency
+    resolved["nodes"] = cached.nodes
+    resolved["components"] = cached.components
+    # Opt-in ALT: Dijkstra becomes A* guided by the landmark lower bound.
+    alt = cached.alt
+    if data.get("alt") and alt.landmarks:
+        resolved["lower_bound"] = alt.lower_bound
+        resolved["alt_landmarks"] = alt.landmarks
+    return resolved
+
+
+def trace_graph_state(resolved: Any) -> Any:
+    """
+    Cached state that a resolved query's output depends on beyond its raw input:
+    the landmark set an ALT search is bound to (it decides the expansion order).
+    """
+    if not isinstance(resolved, dict):
+        return None
+    return resolved.get("alt_landmarks")
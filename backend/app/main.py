@@ -1,8 +1,13 @@
 import importlib
 import json
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import Body, FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from typing import Dict, Any
+from .graph_cache import graph_cache, resolve_graph_input, trace_graph_state
+from .profiling import SessionProfiler, profile_store, should_profile
+from .algorithms.pathfinding.lpa_star import LPAStar
+from .trace_export import choose_encoding, stream_trace, trace_cache, trace_etag
 
 app = FastAPI()
 
@@ -47,6 +52,14 @@ ALGORITHMS: Dict[str, Any] = {
     }
 }
 
+# --- Incremental Replanning ---
+# Grid algorithms that /ws/replan can repair incrementally, mapped to LPA*'s cost model.
+# LPA* is grid-only, so it stays out of ALGORITHMS (the UI lists those for both views).
+REPLANNERS: Dict[str, Dict[str, Any]] = {
+    "bfs": {"weighted": False},
+    "dijkstra": {"weighted": True}
+}
+
 # --- Helper Function ---
 def get_algorithm_class(category: str, name: str) -> Any:
     """Dynamically imports and returns an algorithm class from the registry."""
@@ -74,11 +87,122 @@ async def get_algorithms_api():
                 response[category][name] = getattr(AlgorithmClass, 'metadata', {})
     return response
 
+# --- Graph Cache Routes ---
+@app.post("/api/graphs")
+def upload_graph_api(payload: Dict[str, Any] = Body(...)):
+    """
+    Stores a network graph by content hash and preprocesses it once.
+    Later runs send {"graph_id", "start", "end"} instead of the full adjacency.
+    Optional "landmarks": n precomputes ALT landmark distances.
+    A plain `def` on purpose: FastAPI runs it in the threadpool, so heavy
+    preprocessing does not stall the event loop serving open sockets.
+    """
+    try:
+        cached = graph_cache.add(payload)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return cached.summary()
+
+@app.get("/api/graphs/{graph_id}")
+async def get_graph_api(graph_id: str):
+    cached = graph_cache.get(graph_id)
+    if cached is None:
+        raise HTTPException(status_code=404, detail="Graph not found")
+    return cached.summary()
+
+@app.delete("/api/graphs/{graph_id}")
+async def delete_graph_api(graph_id: str):
+    if not graph_cache.remove(graph_id):
+        raise HTTPException(status_code=404, detail="Graph not found")
+    return {"deleted": graph_id}
+
+# --- Profiling Routes ---
+@app.get("/api/profiles")
+async def list_profiles_api():
+    """Lists recently profiled sessions (see ?profile=1 on /ws/visualize)."""
+    return profile_store.list()
+
+@app.get("/api/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile_api(profile_id: str):
+    """Returns a session profile as folded stacks, ready for flamegraph.pl or speedscope."""
+    profiler = profile_store.get(profile_id)
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profiler.folded()
+
+# --- Trace Export Routes ---
+def trace_response(request: Request, category: str, algorithm_name: str, initial_data: Any):
+    """Runs an algorithm and streams every step as NDJSON, compressed if the client accepts it."""
+    AlgorithmClass = get_algorithm_class(category, algorithm_name)
+    if not AlgorithmClass:
+        raise HTTPException(status_code=404, detail="Algorithm not found")
+
+    # Constructors index straight into the input, so malformed shapes surface as Key/TypeError.
+    if not isinstance(initial_data, (dict, list)):
+        raise HTTPException(status_code=400, detail="Invalid input data: expected a JSON object or list.")
+    try:
+        resolved_data = resolve_graph_input(initial_data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid input data: {e}")
+
+    # For cached graphs the body also depends on the landmark set the query was bound to.
+    etag = trace_etag(category, algorithm_name, initial_data, trace_graph_state(resolved_data))
+    headers = {
+        "ETag": etag,
+        "Vary": "Accept-Encoding",
+        "Cache-Control": "public, max-age=86400"
+    }
+    if trace_cache.matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        algorithm_instance = AlgorithmClass(resolved_data)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid input data: missing field {e}")
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid input data: {e}")
+
+    encoding = choose_encoding(request.headers.get("accept-encoding"))
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return StreamingResponse(
+        stream_trace(algorithm_instance.run(), encoding, etag),
+        media_type="application/x-ndjson",
+        headers=headers
+    )
+
+@app.get("/api/trace/{category}/{algorithm_name}")
+async def get_trace_api(request: Request, category: str, algorithm_name: str, data: str):
+    """Cacheable form: the input is passed as JSON in the `data` query parameter."""
+    try:
+        initial_data: Any = json.loads(data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid input data: {e}")
+    return trace_response(request, category, algorithm_name, initial_data)
+
+@app.post("/api/trace/{category}/{algorithm_name}")
+async def post_trace_api(request: Request, category: str, algorithm_name: str, initial_data: Any = Body(...)):
+    """Same as the GET route, for inputs too large for a URL."""
+    return trace_response(request, category, algorithm_name, initial_data)
+
+# --- Replanning Route ---
+@app.get("/api/replan")
+async def get_replan_api():
+    """Describes the incremental replanning mode served on /ws/replan/{algorithm}."""
+    return {"algorithms": list(REPLANNERS), "metadata": LPAStar.metadata}
+
 # --- WebSocket Route ---
 @app.websocket("/ws/visualize/{category}/{algorithm_name}")
 async def websocket_endpoint(websocket: WebSocket, category: str, algorithm_name: str):
 
-    await websocket.accept()
+    # Profiled sessions learn their profile ID from the X-Profile-Id handshake header.
+    # Browsers cannot read WebSocket response headers, so they may pick one via ?profile_id=.
+    profiler = None
+    if should_profile(websocket.query_params.get("profile")):
+        profiler = SessionProfiler(category, algorithm_name, websocket.query_params.get("profile_id"))
+        await websocket.accept(headers=[(b"x-profile-id", profiler.profile_id.encode("ascii"))])
+    else:
+        await websocket.accept()
     
     AlgorithmClass = get_algorithm_class(category, algorithm_name)
     if not AlgorithmClass:
@@ -89,15 +213,20 @@ async def websocket_endpoint(websocket: WebSocket, category: str, algorithm_name
         # 1. Wait to receive the data from the client
         data_str = await websocket.receive_text()
         
-        # 2. Input is generic (can be a list, dict, etc.)
-        initial_data: Any = json.loads(data_str)
+        # 2. Input is generic (can be a list, dict, etc.).
+        #    A {"graph_id": ...} reference is swapped for the cached graph.
+        initial_data: Any = resolve_graph_input(json.loads(data_str))
 
         # 3. Initialize the algorithm. The class itself handles validation.
         algorithm_instance = AlgorithmClass(initial_data)
         
         # 4. Run the algorithm and stream steps back to the client.
-        for step in algorithm_instance.run():
-            await websocket.send_json(step)
+        #    Profiled sessions take a separate loop so the default path stays untouched.
+        if profiler:
+            await profiler.stream(websocket, algorithm_instance.run())
+        else:
+            for step in algorithm_instance.run():
+                await websocket.send_json(step)
             
     except WebSocketDisconnect:
         print(f"Client disconnected.")
@@ -111,4 +240,42 @@ async def websocket_endpoint(websocket: WebSocket, category: str, algorithm_name
     finally:
         if websocket.client_state != "DISCONNECTED":
             await websocket.close()
-            print("Visualization finished, connection closed.")
\ No newline at end of file
+            print("Visualization finished, connection closed.")
+
+@app.websocket("/ws/replan/{algorithm_name}")
+async def replan_endpoint(websocket: WebSocket, algorithm_name: str):
+    """
+    Incremental grid pathfinding. The first message is the grid input (as for
+    /ws/visualize); every later message is a cell edit, answered with only the
+    repaired cells and the new path. Search state lives as long as the socket.
+    """
+    await websocket.accept()
+
+    if algorithm_name not in REPLANNERS:
+        await websocket.close(code=1008, reason="Algorithm does not support replanning")
+        return
+
+    try:
+        initial_data: Any = json.loads(await websocket.receive_text())
+        planner = LPAStar(initial_data, **REPLANNERS[algorithm_name])
+        for step in planner.run():
+            await websocket.send_json(step)
+
+        # Bad edit messages are answered with an error step; the session stays open.
+        while True:
+            try:
+                edits: Any = json.loads(await websocket.receive_text())
+            except ValueError as e:
+                await websocket.send_json(planner.error_step(f"not valid JSON ({e})"))
+                continue
+            for step in planner.apply_edits(edits):
+                await websocket.send_json(step)
+
+    except WebSocketDisconnect:
+        print(f"Replanning client disconnected.")
+    except ValueError as e:
+        print(f"Data validation error: {e}")
+        await websocket.close(code=1003, reason=f"Invalid input data: {e}")
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        await websocket.close(code=1011, reason=f"An error occurred: {e}")
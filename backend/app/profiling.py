@@ -0,0 +1,165 @@
+import json
+import os
+import re
+import sys
+import time
+import uuid
+from collections import OrderedDict, defaultdict
+from typing import Dict, Any, Generator, List, Optional
+
+from fastapi import WebSocket
+
+# Admin switch: profile every visualization session, not only those asking for it.
+PROFILE_ALL = os.getenv("ALGOVIZ_PROFILE_ALL", "").lower() in ("1", "true", "yes")
+# How many finished profiles are kept before the oldest one is dropped.
+MAX_STORED_PROFILES = 32
+PROFILE_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+# Every Nth step runs under the tracer for the flamegraph; the others are only
+# timed, so phase totals carry no tracer overhead.
+TRACE_EVERY_STEPS = 10
+
+
+def should_profile(query_flag: Optional[str]) -> bool:
+    """Profiling is opt-in: either the admin switch is on or the client passed ?profile=1."""
+    if PROFILE_ALL:
+        return True
+    return query_flag is not None and query_flag.lower() in ("1", "true", "yes")
+
+
+class SessionProfiler:
+    """
+    Deterministic profiler for a single visualization session.
+
+    Time is split into three phases so the folded output shows where a run goes:
+    - generator: advancing `run()` (get_neighbors, get_snapshot, data.copy(), ...)
+    - serialize: encoding each step to JSON
+    - send: writing the encoded step to the WebSocket
+    Every TRACE_EVERY_STEPS-th step is traced call by call and recorded in the
+    folded format ("a;b;c <microseconds>") that flamegraph.pl, speedscope and
+    inferno read directly; those stacks include tracer overhead. Phase totals in
+    the summary come only from the untraced steps, so the split is unbiased.
+    """
+
+    def __init__(self, category: str, algorithm_name: str, profile_id: Optional[str] = None):
+        # A client-chosen ID is used when it is safe to echo in a header and URL.
+        if profile_id and PROFILE_ID_PATTERN.fullmatch(profile_id):
+            self.profile_id = profile_id
+        else:
+            self.profile_id = uuid.uuid4().hex[:12]
+        self.category = category
+        self.algorithm_name = algorithm_name
+        self.started_at = time.time()
+        self.steps = 0
+        self.timed_steps = 0
+        self.phase_totals: Dict[str, float] = {"generator": 0.0, "serialize": 0.0, "send": 0.0}
+        self.stacks: Dict[str, float] = defaultdict(float)
+        # Each frame: [label, entered_at, time spent in children]
+        self._frames: List[List[Any]] = []
+
+    @staticmethod
+    def _label(frame, event: str, arg: Any) -> str:
+        if event == "c_call":
+            return getattr(arg, "__qualname__", repr(arg))
+        module = frame.f_globals.get("__name__", "?")
+        return f"{module}:{frame.f_code.co_qualname}"
+
+    def _trace(self, frame, event: str, arg: Any) -> None:
+        now = time.perf_counter()
+        if event in ("call", "c_call"):
+            self._frames.append([self._label(frame, event, arg), now, 0.0])
+        elif event in ("return", "c_return", "c_exception"):
+            # Returns from frames entered before tracing started are ignored.
+            if len(self._frames) <= 1: return
+            label, entered_at, child_time = self._frames.pop()
+            elapsed = now - entered_at
+            path = ";".join(f[0] for f in self._frames) + ";" + label
+            self.stacks[path] += elapsed - child_time
+            self._frames[-1][2] += elapsed
+
+    def _traced(self, phase: str, func, *args) -> Any:
+        self._frames = [[phase, time.perf_counter(), 0.0]]
+        sys.setprofile(self._trace)
+        try:
+            return func(*args)
+        finally:
+            sys.setprofile(None)
+            _, entered_at, child_time = self._frames[0]
+            elapsed = time.perf_counter() - entered_at
+            self.stacks[phase] += elapsed - child_time
+            self._frames = []
+
+    def _timed(self, phase: str, func, *args) -> Any:
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.phase_totals[phase] += time.perf_counter() - started
+
+    async def stream(self, websocket: WebSocket, steps: Generator[Dict[str, Any], None, None]) -> None:
+        """Drop-in replacement for the plain `send_json` loop, with every phase measured."""
+        sentinel = object()
+        try:
+            while True:
+                traced = self.steps % TRACE_EVERY_STEPS == 0
+                measure = self._traced if traced else self._timed
+                step = measure("generator", next, steps, sentinel)
+                if step is sentinel: break
+                # Same encoding as WebSocket.send_json, done here so it can be timed separately.
+                text = measure("serialize", _encode_step, step)
+                started = time.perf_counter()
+                await websocket.send_text(text)
+                elapsed = time.perf_counter() - started
+                if traced:
+                    self.stacks["send"] += elapsed
+                else:
+                    self.phase_totals["send"] += elapsed
+                    self.timed_steps += 1
+                self.steps += 1
+        finally:
+            profile_store.add(self)
+            print(f"Profile {self.profile_id} stored for {self.category}/{self.algorithm_name}.")
+
+    def folded(self) -> str:
+        lines = []
+        for path, seconds in sorted(self.stacks.items()):
+            micros = int(seconds * 1_000_000)
+            if micros > 0:
+                lines.append(f"{path} {micros}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "profile_id": self.profile_id,
+            "algorithm": f"{self.category}/{self.algorithm_name}",
+            "started_at": self.started_at,
+            "steps": self.steps,
+            # Phase totals cover only these untraced steps.
+            "timed_steps": self.timed_steps,
+            "seconds": {phase: round(total, 6) for phase, total in self.phase_totals.items()}
+        }
+
+
+def _encode_step(step: Dict[str, Any]) -> str:
+    return json.dumps(step, separators=(",", ":"), ensure_ascii=False)
+
+
+class ProfileStore:
+    """Keeps the most recent session profiles in memory, oldest evicted first."""
+
+    def __init__(self, max_size: int = MAX_STORED_PROFILES):
+        self.max_size = max_size
+        self._profiles: "OrderedDict[str, SessionProfiler]" = OrderedDict()
+
+    def add(self, profiler: SessionProfiler) -> None:
+        self._profiles[profiler.profile_id] = profiler
+        while len(self._profiles) > self.max_size:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[SessionProfiler]:
+        return self._profiles.get(profile_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [profiler.summary() for profiler in reversed(self._profiles.values())]
+
+
+profile_store = ProfileStore()
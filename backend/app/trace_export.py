@@ -0,0 +1,115 @@
+import hashlib
+import json
+import zlib
+from collections import OrderedDict
+from typing import Dict, Any, Generator, Iterator, List, Optional
+
+try:
+    import zstandard
+except ImportError:  # Declared as a dependency; without it only gzip is offered.
+    zstandard = None
+
+# Flush the compressor every N steps so clients see output while the trace is running.
+FLUSH_EVERY_STEPS = 256
+# Uncompressed output is batched into chunks of about this size, so each step is not its own write.
+CHUNK_SIZE = 64 * 1024
+# How many completed trace ETags are remembered for conditional requests.
+MAX_CACHED_TRACES = 1024
+
+
+def trace_etag(category: str, algorithm_name: str, initial_data: Any, graph_state: Any = None) -> str:
+    """
+    Traces are deterministic, so the input identifies the response body, plus any
+    server-side graph state the run depends on (see trace_graph_state).
+    """
+    canonical = json.dumps([category, algorithm_name, initial_data, graph_state], sort_keys=True, separators=(",", ":"))
+    return 'W/"' + hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> str:
+    """Picks zstd, then gzip, then identity, honouring q=0 exclusions."""
+    accepted = set()
+    for token in (accept_encoding or "").split(","):
+        parts = [part.strip() for part in token.split(";")]
+        if not parts[0]: continue
+        if any(param.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000") for param in parts[1:]):
+            continue
+        accepted.add(parts[0].lower())
+    if zstandard is not None and ("zstd" in accepted or "*" in accepted):
+        return "zstd"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return "identity"
+
+
+class TraceCache:
+    """Remembers which traces have been produced in full, so they can be revalidated with 304."""
+
+    def __init__(self, max_size: int = MAX_CACHED_TRACES):
+        self.max_size = max_size
+        self._etags: "OrderedDict[str, None]" = OrderedDict()
+
+    def add(self, etag: str) -> None:
+        self._etags[etag] = None
+        self._etags.move_to_end(etag)
+        while len(self._etags) > self.max_size:
+            self._etags.popitem(last=False)
+
+    def matches(self, if_none_match: Optional[str], etag: str) -> bool:
+        if not if_none_match or etag not in self._etags:
+            return False
+        # If-None-Match uses weak comparison, so W/"x" and "x" are equal.
+        strip_weak = lambda tag: tag[2:] if tag.startswith("W/") else tag
+        candidates = [strip_weak(tag.strip()) for tag in if_none_match.split(",")]
+        return "*" in candidates or strip_weak(etag) in candidates
+
+
+trace_cache = TraceCache()
+
+
+def _ndjson_lines(steps: Generator[Dict[str, Any], None, None]) -> Iterator[bytes]:
+    for step in steps:
+        yield json.dumps(step, separators=(",", ":"), ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def _chunked(lines: Iterator[bytes]) -> Iterator[bytes]:
+    buffer: List[bytes] = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE or len(buffer) >= FLUSH_EVERY_STEPS:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def _compressed(lines: Iterator[bytes], encoding: str) -> Iterator[bytes]:
+    if encoding == "identity":
+        yield from _chunked(lines)
+        return
+
+    if encoding == "zstd":
+        compressor = zstandard.ZstdCompressor().compressobj()
+        sync_flush = lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) # gzip container
+        sync_flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    for count, line in enumerate(lines, start=1):
+        chunk = compressor.compress(line)
+        if count % FLUSH_EVERY_STEPS == 0:
+            chunk += sync_flush()
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+
+def stream_trace(steps: Generator[Dict[str, Any], None, None], encoding: str, etag: str) -> Iterator[bytes]:
+    """
+    Lazily turns a `run()` generator into (compressed) NDJSON, one step per line.
+    Only one step is held at a time; the ETag is remembered once the trace completes.
+    """
+    yield from _compressed(_ndjson_lines(steps), encoding)
+    trace_cache.add(etag)